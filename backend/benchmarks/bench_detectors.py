@@ -0,0 +1,65 @@
+"""
+Compare face detector backend throughput on CPU
+
+    python benchmarks/bench_detectors.py [--images a.jpg b.jpg] [--repeat 20]
+
+Without --images, synthetic frames at several resolutions are used. They
+measure raw detector cost per frame, not detection accuracy.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_detectors import DETECTORS, get_face_detector  # noqa: E402
+
+RESOLUTIONS = [(480, 640), (720, 1280), (1080, 1920), (3024, 4032)]
+
+
+def synthetic_frames():
+    rng = np.random.default_rng(0)
+    return {f"{w}x{h}": rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for h, w in RESOLUTIONS}
+
+
+def load_images(paths):
+    from PIL import Image
+    return {os.path.basename(path): np.asarray(Image.open(path).convert('RGB')) for path in paths}
+
+
+def bench(detector, image, repeat):
+    detector.detect(image)  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        detector.detect(image)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', nargs='*', help='Real images to use instead of synthetic frames')
+    parser.add_argument('--backends', nargs='*', default=list(DETECTORS), help='Backends to compare')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    images = load_images(args.images) if args.images else synthetic_frames()
+
+    print(f"{'backend':<8} {'image':<14} {'p50 ms':>9} {'p95 ms':>9} {'fps':>8}")
+    for name in args.backends:
+        try:
+            detector = get_face_detector(name)
+        except Exception as e:
+            print(f"{name:<8} skipped: {e}")
+            continue
+        for label, image in images.items():
+            ms = bench(detector, image, args.repeat)
+            print(f"{name:<8} {label:<14} {np.percentile(ms, 50):9.1f} {np.percentile(ms, 95):9.1f} {1000 / ms.mean():8.1f}")
+
+
+if __name__ == '__main__':
+    main()
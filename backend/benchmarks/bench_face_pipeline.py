@@ -0,0 +1,279 @@
+"""
+Micro-benchmarks for the face pipeline, with results saved as JSON
+
+    python benchmarks/bench_face_pipeline.py [--images a.jpg ...] [--repeat 20]
+                                             [--output out.json] [--compare base.json]
+
+Cases: detect_and_encode_face (split into its decode/detect/encode stages),
+validate_face_image, compare_faces, eye_aspect_ratio, is_blinking and
+is_masked. Without --images, a drawn face is rendered at several
+resolutions (seeded, so runs are comparable). Drawn faces may not be found
+by the detector; the encode stage is then reported as skipped, and real
+photos should be passed with --images to measure it.
+
+Everything runs offline on CPU. If models/mask_detector.h5 is missing, a
+stub mask model is used, so is_masked then measures preprocessing and
+batching overhead only; "mask_model" in the JSON says which one ran.
+
+Results go to benchmarks/results/face_pipeline-<commit>.json by default.
+--compare prints the p50 change against an earlier result file.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import types
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from metrics import collect_stages  # noqa: E402
+
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 720), (1920, 1080)]
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+
+# ---------------------- Fixtures ---------------------- #
+
+def synthetic_face(width, height, seed=0):
+    """A drawn face (skin oval, eyes, brows, nose, mouth) on a noisy background, as JPEG bytes"""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(90, 160, (height, width, 3), dtype=np.uint8)
+    cx, cy = width // 2, height // 2
+    fw, fh = int(min(width, height) * 0.22), int(min(width, height) * 0.3)
+    cv2.ellipse(image, (cx, cy), (fw, fh), 0, 0, 360, (140, 170, 215), -1)
+    for side in (-1, 1):
+        ex, ey = cx + side * fw // 2, cy - fh // 4
+        cv2.ellipse(image, (ex, ey), (fw // 5, fh // 10), 0, 0, 360, (255, 255, 255), -1)
+        cv2.circle(image, (ex, ey), fh // 14, (40, 30, 20), -1)
+        cv2.line(image, (ex - fw // 5, ey - fh // 6), (ex + fw // 5, ey - fh // 6), (40, 40, 60), max(2, fh // 30))
+    cv2.line(image, (cx, cy - fh // 10), (cx - fw // 10, cy + fh // 6), (100, 120, 170), max(2, fh // 40))
+    cv2.ellipse(image, (cx, cy + fh // 2), (fw // 3, fh // 10), 0, 0, 180, (60, 60, 150), max(2, fh // 30))
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+
+def load_fixtures(paths):
+    if paths:
+        fixtures = {}
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            fixtures[f"{os.path.basename(path)} ({image.shape[1]}x{image.shape[0]})"] = data
+        return fixtures
+    return {f"synthetic {w}x{h}": synthetic_face(w, h) for w, h in RESOLUTIONS}
+
+
+def landmark_shape(ear):
+    """Object with shape.part(i).x/.y like dlib's, with both eyes at the given aspect ratio"""
+    points = [(0, 0)] * 68
+    for start, x0 in ((36, 100), (42, 200)):
+        # p0..p5 around the eye: width 60, so vertical gaps of ear * 60
+        h = ear * 60 / 2
+        eye = [(x0, 100), (x0 + 20, 100 - h), (x0 + 40, 100 - h), (x0 + 60, 100), (x0 + 40, 100 + h), (x0 + 20, 100 + h)]
+        points[start:start + 6] = eye
+    parts = [types.SimpleNamespace(x=x, y=y) for x, y in points]
+    return types.SimpleNamespace(part=lambda i: parts[i])
+
+
+class StubMaskModel:
+    """Stands in for the Keras mask model: same call signature, output (batch, 2)"""
+
+    def __call__(self, batch, training=False):
+        batch = np.asarray(batch)
+        score = batch.reshape(len(batch), -1).mean(axis=1)
+        return np.stack([score, 1 - score], axis=1)
+
+
+# ---------------------- Runner ---------------------- #
+
+def summarize(timings_ms):
+    timings_ms = np.asarray(timings_ms)
+    return {
+        "n": int(len(timings_ms)),
+        "p50_ms": round(float(np.percentile(timings_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(timings_ms, 95)), 4),
+        "mean_ms": round(float(timings_ms.mean()), 4),
+        "throughput_per_s": round(float(1000 / timings_ms.mean()), 2) if timings_ms.mean() > 0 else None,
+    }
+
+
+def time_calls(fn, repeat):
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def bench_detect_and_encode(fixtures, repeat):
+    # detect_and_encode_face turns a missing face_recognition into an error
+    # result, which would be timed as if it were the real pipeline
+    import face_recognition  # noqa: F401
+    from face_utils import detect_and_encode_face
+    rows = []
+    for label, data in fixtures.items():
+        detect_and_encode_face(data)  # warm-up
+        totals, stages, found = [], {}, False
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with collect_stages() as timings:
+                result = detect_and_encode_face(data)
+            totals.append((time.perf_counter() - start) * 1000)
+            if not result.get("success"):
+                continue
+            found = True
+            for stage, seconds in timings.items():
+                stages.setdefault(stage, []).append(seconds * 1000)
+        rows.append({"case": "detect_and_encode_face", "fixture": label, "stage": "total", "face_found": found, **summarize(totals)})
+        for stage in ("decode", "detect", "encode"):
+            if stage in stages:
+                rows.append({"case": "detect_and_encode_face", "fixture": label, "stage": stage, **summarize(stages[stage])})
+            else:
+                rows.append({"case": "detect_and_encode_face", "fixture": label, "stage": stage, "skipped": "no face found"})
+    return rows
+
+
+def bench_validate(fixtures, repeat):
+    from face_utils import validate_face_image
+    rows = []
+    for label, data in fixtures.items():
+        upload = io.BytesIO(data)
+        timings = time_calls(lambda: validate_face_image(upload), repeat)
+        rows.append({"case": "validate_face_image", "fixture": label, "stage": "total", **summarize(timings)})
+    return rows
+
+
+def bench_compare(repeat):
+    from face_utils import compare_faces
+    rng = np.random.default_rng(0)
+    # Encodings as stored in / read from the database: plain lists of floats
+    known, probe = (rng.normal(0, 0.1, 128).tolist() for _ in range(2))
+    timings = time_calls(lambda: compare_faces(known, probe), repeat * 50)
+    return [{"case": "compare_faces", "fixture": "128-d lists", "stage": "total", **summarize(timings)}]
+
+
+def bench_blink(repeat):
+    from attendance_ml import eye_aspect_ratio, is_blinking
+    rows = []
+    for label, ear in (("eyes open", 0.3), ("eyes closed", 0.15)):
+        shape = landmark_shape(ear)
+        eye = np.array([(shape.part(i).x, shape.part(i).y) for i in range(36, 42)])
+        timings = time_calls(lambda: eye_aspect_ratio(eye), repeat * 50)
+        rows.append({"case": "eye_aspect_ratio", "fixture": label, "stage": "total", **summarize(timings)})
+        timings = time_calls(lambda: is_blinking(shape), repeat * 50)
+        rows.append({"case": "is_blinking", "fixture": label, "stage": "total", **summarize(timings)})
+    return rows
+
+
+def setup_mask_model():
+    """Use the real model if its file exists, else install the stub. Returns "h5" or "stub"."""
+    import attendance_ml
+    if os.path.exists(attendance_ml.MASK_MODEL_PATH):
+        return "h5"
+    attendance_ml._resources["mask_model"] = StubMaskModel()
+    return "stub"
+
+
+def bench_mask(fixtures, repeat):
+    from attendance_ml import is_masked
+    rows = []
+    for label, data in fixtures.items():
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        h, w = image.shape[:2]
+        face = image[h // 5:h * 4 // 5, w // 3:w * 2 // 3]
+        timings = time_calls(lambda: is_masked(face), repeat)
+        rows.append({"case": "is_masked", "fixture": label, "stage": "total", **summarize(timings)})
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def print_rows(rows, baseline=None):
+    base = {(r["case"], r["fixture"], r["stage"]): r for r in (baseline or {}).get("results", [])}
+    print(f"{'case':<24} {'fixture':<24} {'stage':<7} {'p50 ms':>10} {'p95 ms':>10} {'per s':>10}" + (f" {'p50 vs base':>12}" if base else ""))
+    for row in rows:
+        prefix = f"{row['case']:<24} {row['fixture'][:24]:<24} {row['stage']:<7}"
+        if "skipped" in row:
+            print(f"{prefix} skipped: {row['skipped']}")
+            continue
+        line = f"{prefix} {row['p50_ms']:10.3f} {row['p95_ms']:10.3f} {row['throughput_per_s'] or 0:10.1f}"
+        old = base.get((row["case"], row["fixture"], row["stage"]))
+        if old and old.get("p50_ms"):
+            line += f" {(row['p50_ms'] / old['p50_ms'] - 1) * 100:+11.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", nargs="*", help="Real images to use instead of synthetic faces")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.images)
+    commit = git_commit()
+    mask_model = None
+
+    cases = [
+        ("detect_and_encode_face", lambda: bench_detect_and_encode(fixtures, args.repeat)),
+        ("validate_face_image", lambda: bench_validate(fixtures, args.repeat)),
+        ("compare_faces", lambda: bench_compare(args.repeat)),
+        ("is_blinking", lambda: bench_blink(args.repeat)),
+        ("is_masked", lambda: bench_mask(fixtures, args.repeat)),
+    ]
+    rows = []
+    for name, run in cases:
+        try:
+            if name == "is_masked":
+                mask_model = setup_mask_model()
+            rows.extend(run())
+        except ImportError as e:
+            rows.append({"case": name, "fixture": "-", "stage": "-", "skipped": f"missing dependency: {e.name}"})
+
+    results = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "repeat": args.repeat,
+        "mask_model": mask_model,
+        "results": rows,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare} (commit {baseline.get('commit')})")
+    print_rows(rows, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"face_pipeline-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
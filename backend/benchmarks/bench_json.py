@@ -0,0 +1,111 @@
+"""
+Compare JSON response encoding for the employee and leave list endpoints
+
+    python benchmarks/bench_json.py [--rows 1000] [--repeat 20]
+
+"legacy" is the old path: serialize_doc() rebuilds every document in Python,
+then Flask's default provider encodes the copy. "provider" passes the
+documents straight to MongoJSONProvider. Both build a full Flask response
+from synthetic documents shaped like the real ones, so the numbers measure
+serialization only, not Mongo.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_provider import MongoJSONProvider, msgspec  # noqa: E402
+
+
+def legacy_serialize(doc):
+    """The recursive converter the routes used before MongoJSONProvider"""
+    if doc is None:
+        return None
+    if isinstance(doc, list):
+        return [legacy_serialize(item) for item in doc]
+    if isinstance(doc, dict):
+        result = {}
+        for key, value in doc.items():
+            if isinstance(value, ObjectId):
+                result[key] = str(value)
+            elif isinstance(value, datetime):
+                result[key] = value.isoformat()
+            elif isinstance(value, dict):
+                result[key] = legacy_serialize(value)
+            elif isinstance(value, list):
+                result[key] = [legacy_serialize(item) for item in value]
+            else:
+                result[key] = value
+        return result
+    return doc
+
+
+def department():
+    return {'_id': ObjectId(), 'name': 'Engineering', 'description': 'Engineering department',
+            'office_locations': [{'lat': 28.7041, 'lng': 77.1025, 'radius': 200}]}
+
+
+def employees(rows):
+    now = datetime(2025, 1, 1)
+    return [{
+        '_id': ObjectId(), 'name': f'Employee {i}', 'email': f'employee{i}@company.com',
+        'gender': 'female', 'role': 'employee', 'status': 'active',
+        'department_id': str(ObjectId()), 'department': department(),
+        'created_at': now + timedelta(minutes=i),
+    } for i in range(rows)]
+
+
+def leaves(rows):
+    now = datetime(2025, 1, 1)
+    staff = employees(max(1, rows // 10))
+    return [{
+        '_id': ObjectId(), 'user_id': staff[i % len(staff)]['_id'], 'user': staff[i % len(staff)],
+        'leave_type': 'sick', 'from_date': '2025-01-10', 'to_date': '2025-01-12',
+        'reason': 'Unwell', 'status': 'pending', 'created_at': now + timedelta(hours=i),
+    } for i in range(rows)]
+
+
+def bench(encode, docs, repeat):
+    encode(docs)  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(docs)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    legacy_app = Flask('legacy')
+    provider_app = Flask('provider')
+    provider_app.json = MongoJSONProvider(provider_app)
+
+    paths = {
+        'legacy': lambda docs: legacy_app.json.response(legacy_serialize(docs)),
+        'provider': lambda docs: provider_app.json.response(docs),
+    }
+
+    print(f"msgspec: {'yes' if msgspec else 'no (stdlib json fallback)'}, {args.rows} rows")
+    print(f"{'endpoint':<12}{'path':<10}{'p50 ms':>10}{'p95 ms':>10}{'rows/s':>12}")
+    for endpoint, docs in (('employees', employees(args.rows)), ('leaves', leaves(args.rows))):
+        for name, encode in paths.items():
+            with (legacy_app if name == 'legacy' else provider_app).app_context():
+                timings = bench(encode, docs, args.repeat)
+            p50 = np.percentile(timings, 50)
+            print(f"{endpoint:<12}{name:<10}{p50:>10.2f}{np.percentile(timings, 95):>10.2f}{args.rows / p50 * 1000:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import csv
+import io
+import os
+import zipfile
+
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_FIELDS = ['name', 'email', 'password', 'gender', 'department_id', 'image']
+BULK_ENROLL_MAX_ROWS = int(os.environ.get('BULK_ENROLL_MAX_ROWS', 1000))
+
+
+class EnrollmentUploadError(Exception):
+    """Raised when a bulk enrollment upload can't be parsed at all"""
+
+
+def _read_manifest(text):
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [field for field in MANIFEST_FIELDS if field not in (reader.fieldnames or [])]
+    if missing:
+        raise EnrollmentUploadError(f"Manifest is missing columns: {', '.join(missing)}")
+    rows = list(reader)
+    if len(rows) > BULK_ENROLL_MAX_ROWS:
+        raise EnrollmentUploadError(f'Manifest has {len(rows)} rows, the limit is {BULK_ENROLL_MAX_ROWS}')
+    return [{key: (row.get(key) or '').strip() for key in MANIFEST_FIELDS} for row in rows]
+
+
+def parse_enrollment_upload(files):
+    """
+    Read a bulk enrollment upload into manifest rows with their image bytes
+
+    Accepts either an 'archive' ZIP holding manifest.csv plus the images, or
+    a 'manifest' CSV file alongside multiple 'images' file parts. The
+    manifest's image column names the image file for each row.
+
+    Args:
+        files: request.files
+
+    Returns:
+        list: One dict per manifest row, with an 'image_data' key (None if the
+              image was not found in the upload)
+    """
+    archive = files.get('archive')
+    if archive:
+        try:
+            bundle = zipfile.ZipFile(io.BytesIO(archive.read()))
+        except zipfile.BadZipFile:
+            raise EnrollmentUploadError('Archive is not a valid ZIP file')
+        # Match files by base name so images may sit in a sub-folder of the ZIP
+        members = {os.path.basename(name): name for name in bundle.namelist() if not name.endswith('/')}
+        if MANIFEST_NAME not in members:
+            raise EnrollmentUploadError(f'Archive must contain {MANIFEST_NAME}')
+        rows = _read_manifest(bundle.read(members[MANIFEST_NAME]).decode('utf-8-sig'))
+        for row in rows:
+            member = members.get(os.path.basename(row['image']))
+            row['image_data'] = bundle.read(member) if member else None
+        return rows
+
+    manifest = files.get('manifest')
+    if not manifest:
+        raise EnrollmentUploadError("Upload an 'archive' ZIP or a 'manifest' CSV with 'images'")
+    rows = _read_manifest(manifest.read().decode('utf-8-sig'))
+    images = {os.path.basename(image.filename): image for image in files.getlist('images')}
+    for row in rows:
+        image = images.get(os.path.basename(row['image']))
+        row['image_data'] = image.read() if image else None
+    return rows
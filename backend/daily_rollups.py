@@ -0,0 +1,158 @@
+from datetime import date, timedelta
+
+from pymongo import UpdateOne
+
+# One document per (date, department_id) in the daily_rollups collection:
+#   {date, department_id, present, late, overtime_hours, headcount}
+# mark_attendance and punch_out keep it current with $inc; rebuild_rollups()
+# recomputes it from attendance_records. headcount is the department's
+# employee count when the document was created, so absent (headcount -
+# present) stays right for past days after people join or leave. Days with
+# no document at all, and documents written before headcount was stored,
+# fall back to the current headcount.
+
+
+def department_headcount(db, department_id):
+    return db.users.count_documents({'role': 'employee', 'department_id': department_id})
+
+
+def department_headcounts(db, department_id=None):
+    """Current number of employees per department_id"""
+    match = {'role': 'employee'}
+    if department_id:
+        match['department_id'] = department_id
+    pipeline = [{'$match': match}, {'$group': {'_id': '$department_id', 'count': {'$sum': 1}}}]
+    return {group['_id']: group['count'] for group in db.users.aggregate(pipeline)}
+
+
+def _increment(db, day, department_id, inc):
+    key = {'date': day, 'department_id': department_id}
+    if db.daily_rollups.update_one(key, {'$inc': inc}).matched_count:
+        return
+    # First punch of the day for this department: snapshot its headcount
+    db.daily_rollups.update_one(
+        key,
+        {'$inc': inc, '$setOnInsert': {'headcount': department_headcount(db, department_id)}},
+        upsert=True
+    )
+
+
+def record_punch_in(db, day, department_id, is_late):
+    _increment(db, day, department_id, {'present': 1, 'late': 1 if is_late else 0, 'overtime_hours': 0})
+
+
+def record_punch_out(db, day, department_id, overtime_hours):
+    _increment(db, day, department_id, {'overtime_hours': overtime_hours})
+
+
+def rebuild_rollups(db, from_date=None, to_date=None):
+    """
+    Recompute rollups from raw attendance_records
+
+    Args:
+        db: pymongo database
+        from_date, to_date: Optional ISO date bounds (inclusive)
+
+    Returns:
+        int: Number of rollup documents written
+    """
+    date_filter = {}
+    if from_date:
+        date_filter['$gte'] = from_date
+    if to_date:
+        date_filter['$lte'] = to_date
+    match = {'date': date_filter} if date_filter else {}
+
+    pipeline = [
+        {'$match': match},
+        {'$lookup': {'from': 'users', 'localField': 'user_id', 'foreignField': '_id', 'as': 'user'}},
+        {'$project': {
+            'date': 1, 'status': 1, 'is_late': 1, 'overtime_hours': 1,
+            'department_id': {'$arrayElemAt': ['$user.department_id', 0]}
+        }},
+        {'$group': {
+            '_id': {'date': '$date', 'department_id': '$department_id'},
+            'present': {'$sum': {'$cond': [{'$eq': ['$status', 'present']}, 1, 0]}},
+            'late': {'$sum': {'$cond': ['$is_late', 1, 0]}},
+            'overtime_hours': {'$sum': {'$ifNull': ['$overtime_hours', 0]}},
+        }},
+    ]
+
+    rollups = [{
+        'date': group['_id']['date'],
+        'department_id': group['_id'].get('department_id'),
+        'present': group['present'],
+        'late': group['late'],
+        'overtime_hours': group['overtime_hours'],
+    } for group in db.attendance_records.aggregate(pipeline)]
+
+    # Upsert in place so readers never see the range empty, then drop the
+    # rollups for days/departments that no longer have any records. A stored
+    # headcount is kept; new documents get the department's current one.
+    if rollups:
+        headcounts = department_headcounts(db)
+        db.daily_rollups.bulk_write([
+            UpdateOne(
+                {'date': r['date'], 'department_id': r['department_id']},
+                {'$set': r, '$setOnInsert': {'headcount': headcounts.get(r['department_id'], 0)}},
+                upsert=True
+            )
+            for r in rollups
+        ], ordered=False)
+        stale = {**match, '$nor': [{'date': r['date'], 'department_id': r['department_id']} for r in rollups]}
+    else:
+        stale = match
+    db.daily_rollups.delete_many(stale)
+    return len(rollups)
+
+
+def get_daily_totals(db, from_date, to_date, department_id=None):
+    """
+    Company (or single department) totals per day, one entry for every day in range
+
+    Reads at most one document per department per day, so the cost depends
+    on the number of days, not the number of attendance records.
+
+    Returns:
+        list: [{'date', 'present', 'late', 'overtime_hours', 'absent'}] in date order
+    """
+    query = {'date': {'$gte': from_date, '$lte': to_date}}
+    if department_id:
+        query['department_id'] = department_id
+    current_headcounts = department_headcounts(db, department_id)
+
+    totals = {}
+    projection = {'_id': 0, 'date': 1, 'department_id': 1, 'present': 1, 'late': 1, 'overtime_hours': 1, 'headcount': 1}
+    for rollup in db.daily_rollups.find(query, projection):
+        day = totals.setdefault(rollup['date'], {'present': 0, 'late': 0, 'overtime_hours': 0, 'headcounts': {}})
+        day['present'] += rollup.get('present', 0)
+        day['late'] += rollup.get('late', 0)
+        day['overtime_hours'] += rollup.get('overtime_hours', 0)
+        if rollup.get('headcount') is not None:
+            day['headcounts'][rollup.get('department_id')] = rollup['headcount']
+
+    series = []
+    day = date.fromisoformat(from_date)
+    end = date.fromisoformat(to_date)
+    while day <= end:
+        entry = totals.get(day.isoformat(), {'present': 0, 'late': 0, 'overtime_hours': 0, 'headcounts': {}})
+        # Stored headcounts for departments with a rollup that day, current ones for the rest
+        headcount = sum({**current_headcounts, **entry['headcounts']}.values())
+        series.append({
+            'date': day.isoformat(),
+            'present': entry['present'],
+            'late': entry['late'],
+            'overtime_hours': round(entry['overtime_hours'], 2),
+            'absent': max(0, headcount - entry['present']),
+        })
+        day += timedelta(days=1)
+    return series
+
+
+if __name__ == '__main__':
+    # python daily_rollups.py [from_date] [to_date]  -> rebuild rollups from raw records
+    import sys
+    from database import get_db
+
+    count = rebuild_rollups(get_db(), *sys.argv[1:3])
+    print(f"[INFO] Rebuilt {count} daily rollups.")
@@ -0,0 +1,203 @@
+import os
+import threading
+import logging
+
+from pymongo import MongoClient, monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from pymongo.server_api import ServerApi
+
+logger = logging.getLogger(__name__)
+
+# ---------------------- Settings ---------------------- #
+# Point MONGODB_URI at Atlas (mongodb+srv://...), a local mongod or, for
+# tests and benchmarks, "mongomock://" to use an in-memory stand-in.
+# Credentials belong in the environment, never in this file.
+
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
+MONGODB_DB = os.environ.get("MONGODB_DB", "attendance_manager")
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 30000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000))
+# Read preference for report and stats endpoints, e.g. secondaryPreferred
+MONGO_REPORT_READ_PREFERENCE = os.environ.get("MONGO_REPORT_READ_PREFERENCE", "primary")
+
+
+# ---------------------- Pool Metrics ---------------------- #
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so utilisation can be reported"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.checked_out = 0
+            self.created_total = 0
+            self.checkout_failures_total = 0
+            self.pool_clears_total = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def connection_created(self, event):
+        self._add(open=1, created_total=1)
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_checked_out(self, event):
+        self._add(checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def connection_check_out_failed(self, event):
+        self._add(checkout_failures_total=1)
+
+    def pool_cleared(self, event):
+        self._add(pool_clears_total=1)
+
+    # The remaining events carry nothing we report
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'max_pool_size': MONGO_MAX_POOL_SIZE,
+                'open': self.open,
+                'checked_out': self.checked_out,
+                'utilisation': round(self.checked_out / MONGO_MAX_POOL_SIZE, 3) if MONGO_MAX_POOL_SIZE else 0,
+                'created_total': self.created_total,
+                'checkout_failures_total': self.checkout_failures_total,
+                'pool_clears_total': self.pool_clears_total,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+# ---------------------- Client ---------------------- #
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_extra_listeners = []
+
+
+def add_event_listener(listener):
+    """Register a pymongo event listener for clients created from now on"""
+    _extra_listeners.append(listener)
+
+
+def _create_client():
+    if MONGODB_URI.startswith("mongomock://"):
+        import mongomock
+        return mongomock.MongoClient()
+
+    options = {
+        'maxPoolSize': MONGO_MAX_POOL_SIZE,
+        'minPoolSize': MONGO_MIN_POOL_SIZE,
+        'connectTimeoutMS': MONGO_CONNECT_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'socketTimeoutMS': MONGO_SOCKET_TIMEOUT_MS,
+        'waitQueueTimeoutMS': MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'event_listeners': [pool_metrics] + _extra_listeners,
+    }
+    # The Stable API is only understood by Atlas / MongoDB 5.0+
+    if MONGODB_URI.startswith("mongodb+srv://"):
+        options['server_api'] = ServerApi('1')
+    return MongoClient(MONGODB_URI, **options)
+
+
+def get_client():
+    """
+    Return this process's MongoClient, creating it on first use
+
+    MongoClient is not fork-safe, so a client inherited from a parent
+    process (e.g. a gunicorn master) is discarded and a new one is
+    created in the child.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                if _client is not None:
+                    logger.info(f"Process {pid} was forked, creating a new MongoClient")
+                    pool_metrics.reset()
+                _client = _create_client()
+                _client_pid = pid
+    return _client
+
+
+def get_db():
+    return get_client()[MONGODB_DB]
+
+
+def get_reporting_db():
+    """Database handle for report/stats reads, using MONGO_REPORT_READ_PREFERENCE"""
+    mode = read_pref_mode_from_name(MONGO_REPORT_READ_PREFERENCE)
+    return get_client().get_database(MONGODB_DB, read_preference=make_read_preference(mode, None))
+
+
+def ping():
+    try:
+        get_client().admin.command('ping')
+        print("[INFO] Successfully connected to MongoDB!")
+        return True
+    except Exception as e:
+        print("[ERROR] Could not connect to MongoDB:", e)
+        return False
+
+
+class LazyDatabase:
+    """
+    Stand-in for a pymongo Database that resolves the real one on every access
+
+    Lets modules keep module-level handles (db.users, db['users']) while the
+    client itself is only created on first use, and recreated after a fork.
+    """
+
+    def __init__(self, reporting=False):
+        self._reporting = reporting
+
+    def _resolve(self):
+        return get_reporting_db() if self._reporting else get_db()
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
+
+class LazyCollection:
+    """Stand-in for a pymongo Collection, resolved on every access like LazyDatabase"""
+
+    def __init__(self, name, reporting=False):
+        self._name = name
+        self._database = LazyDatabase(reporting)
+
+    def __getattr__(self, name):
+        return getattr(self._database[self._name], name)
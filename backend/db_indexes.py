@@ -0,0 +1,123 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# ---------------------- Index Registry ---------------------- #
+# collection -> list of (keys, options). Applied with create_index, which is a
+# no-op when an identical index already exists, so this is safe to run on
+# every startup.
+
+INDEXES = {
+    'attendance_records': [
+        # One record per user per day; also serves today/history/stats lookups
+        ([('user_id', ASCENDING), ('date', ASCENDING)], {'unique': True, 'name': 'user_date_unique'}),
+        # History keyset pagination sorts on (date, _id) within one user
+        ([('user_id', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)], {'name': 'user_date_id'}),
+        # Admin stats and reports filter on date alone
+        ([('date', ASCENDING)], {'name': 'date'}),
+    ],
+    'daily_rollups': [
+        ([('date', ASCENDING), ('department_id', ASCENDING)], {'unique': True, 'name': 'date_department_unique'}),
+    ],
+    'users': [
+        ([('email', ASCENDING)], {'unique': True, 'name': 'email_unique'}),
+        # Employee list filters on role and pages on _id
+        ([('role', ASCENDING), ('_id', ASCENDING)], {'name': 'role_id'}),
+    ],
+    'leave_requests': [
+        # Leave lists page on (created_at, _id)
+        ([('status', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'status_created_at_id'}),
+        ([('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'created_at_id'}),
+        ([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'user_created_at_id'}),
+    ],
+}
+
+# Queries on the request hot path: (collection, filter, sort). Values are
+# placeholders; only the shape matters to the planner.
+HOT_QUERIES = [
+    ('attendance_records', {'user_id': None, 'date': '2000-01-01'}, None),
+    ('attendance_records', {'user_id': None, 'date': {'$gte': '2000-01-01', '$lte': '2000-12-31'}}, [('date', DESCENDING), ('_id', DESCENDING)]),
+    ('attendance_records', {'date': '2000-01-01'}, None),
+    ('daily_rollups', {'date': {'$gte': '2000-01-01', '$lte': '2000-12-31'}}, None),
+    ('users', {'email': ''}, None),
+    ('users', {'role': 'employee'}, [('_id', ASCENDING)]),
+    ('leave_requests', {'status': 'pending'}, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+    ('leave_requests', {}, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+    ('leave_requests', {'user_id': None}, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+]
+
+
+def ensure_indexes(db):
+    """
+    Create every index in the registry
+
+    A failure on one index (e.g. duplicate emails blocking the unique index)
+    is logged and reported without stopping the rest.
+
+    Returns:
+        list: (collection, index name, error) for each index that could not be created
+    """
+    failures = []
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                logger.error(f"Could not create index {options['name']} on {collection}: {str(e)}")
+                failures.append((collection, options['name'], str(e)))
+    return failures
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def find_uncovered_queries(db, queries=HOT_QUERIES):
+    """
+    explain() each hot query and report those the planner answers with a collection scan
+
+    Returns:
+        list: (collection, filter, sort) for each query whose winning plan has a COLLSCAN
+    """
+    uncovered = []
+    for collection, query, sort in queries:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        if 'COLLSCAN' in set(_plan_stages(winning_plan)):
+            uncovered.append((collection, query, sort))
+    return uncovered
+
+
+if __name__ == '__main__':
+    # python db_indexes.py          -> create all indexes
+    # python db_indexes.py --check  -> also report hot queries not covered by an index
+    import sys
+    from database import get_db
+
+    db = get_db()
+    failures = ensure_indexes(db)
+    print(f"[INFO] Indexes applied, {len(failures)} failed.")
+    for collection, name, error in failures:
+        print(f"[ERROR] {collection}.{name}: {error}")
+
+    if '--check' in sys.argv:
+        uncovered = find_uncovered_queries(db)
+        for collection, query, sort in uncovered:
+            print(f"[WARN] Collection scan: {collection}.find({query}).sort({sort})")
+        if not uncovered:
+            print("[INFO] All hot queries are covered by an index.")
+        sys.exit(1 if failures or uncovered else 0)
+    sys.exit(1 if failures else 0)
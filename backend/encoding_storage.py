@@ -0,0 +1,88 @@
+import numpy as np
+from bson.binary import Binary
+
+# Face encodings are stored as a BSON Binary blob: one version byte followed
+# by the 128 float32 values in little-endian order. Older documents hold a
+# plain list of 128 floats; decode_face_encoding() reads both.
+
+ENCODING_FORMAT_VERSION = 1
+ENCODING_BINARY_SUBTYPE = 0x80  # user-defined BSON binary subtype
+ENCODING_DTYPE = np.dtype('<f4')
+
+# Projection that keeps encodings out of documents sent to clients
+PUBLIC_USER_PROJECTION = {'face_encoding': 0}
+
+
+def encode_face_encoding(encoding):
+    """
+    Pack a face encoding into a versioned BSON Binary blob
+
+    Args:
+        encoding: 128-d face encoding (list or numpy array)
+
+    Returns:
+        bson.binary.Binary
+    """
+    vector = np.asarray(encoding, dtype=ENCODING_DTYPE).reshape(-1)
+    return Binary(bytes([ENCODING_FORMAT_VERSION]) + vector.tobytes(), ENCODING_BINARY_SUBTYPE)
+
+
+def decode_face_encoding(value):
+    """
+    Turn a stored face encoding back into a float32 numpy array
+
+    Binary blobs are decoded with np.frombuffer, so no copy is made. Legacy
+    list-of-floats encodings are converted as before.
+
+    Args:
+        value: Binary blob, list of floats, or numpy array
+
+    Returns:
+        numpy.ndarray: Read-only when decoded from a blob
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        version = value[0]
+        if version != ENCODING_FORMAT_VERSION:
+            raise ValueError(f'Unsupported face encoding format version {version}')
+        return np.frombuffer(value, dtype=ENCODING_DTYPE, offset=1)
+    return np.asarray(value, dtype=ENCODING_DTYPE)
+
+
+def migrate_face_encodings(users_collection, batch_size=500):
+    """
+    Rewrite every legacy list-of-floats face encoding as a Binary blob
+
+    Safe to run more than once: only documents whose encoding is still an
+    array are touched.
+
+    Returns:
+        int: Number of documents migrated
+    """
+    from pymongo import UpdateOne
+
+    cursor = users_collection.find(
+        {'face_encoding': {'$type': 'array'}},
+        {'face_encoding': 1}
+    ).batch_size(batch_size)
+
+    migrated = 0
+    operations = []
+    for user in cursor:
+        operations.append(UpdateOne(
+            {'_id': user['_id']},
+            {'$set': {'face_encoding': encode_face_encoding(user['face_encoding'])}}
+        ))
+        if len(operations) >= batch_size:
+            migrated += users_collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        migrated += users_collection.bulk_write(operations, ordered=False).modified_count
+    return migrated
+
+
+if __name__ == '__main__':
+    # python encoding_storage.py  -> one-shot migration of existing user documents
+    from database import get_db
+
+    count = migrate_face_encodings(get_db()['users'])
+    print(f"[INFO] Migrated {count} face encodings to binary format.")
@@ -0,0 +1,149 @@
+import os
+import threading
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Which backend detect_and_encode_face and the verification pipeline use: hog, dnn or dlib
+FACE_DETECTOR = os.environ.get("FACE_DETECTOR", "hog")
+FACE_DETECTOR_CONFIDENCE = float(os.environ.get("FACE_DETECTOR_CONFIDENCE", 0.5))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DNN_PROTOTXT_PATH = os.environ.get("DNN_PROTOTXT_PATH", os.path.join(BACKEND_DIR, "face_detector", "deploy.prototxt"))
+DNN_WEIGHTS_PATH = os.environ.get("DNN_WEIGHTS_PATH", os.path.join(BACKEND_DIR, "face_detector", "res10_300x300_ssd_iter_140000.caffemodel"))
+
+
+class FaceDetector:
+    """
+    Common interface for face detector backends
+
+    detect() takes an RGB image and returns a list of (box, confidence)
+    where box is (top, right, bottom, left) in pixels, the same format
+    face_recognition uses, so boxes can go straight to face_encodings().
+    """
+
+    name = None
+
+    def __init__(self, confidence=FACE_DETECTOR_CONFIDENCE):
+        self.confidence = confidence
+
+    def detect(self, rgb):
+        raise NotImplementedError
+
+    def locations(self, rgb):
+        """Boxes only, for drop-in use where face_recognition.face_locations was called"""
+        return [box for box, _ in self.detect(rgb)]
+
+
+class HogDetector(FaceDetector):
+    """face_recognition's default HOG detector. It reports no score, so confidence is always 1.0."""
+
+    name = "hog"
+
+    def __init__(self, confidence=FACE_DETECTOR_CONFIDENCE, upsample=1):
+        super().__init__(confidence)
+        import face_recognition
+        self._face_recognition = face_recognition
+        self.upsample = upsample
+
+    def detect(self, rgb):
+        boxes = self._face_recognition.face_locations(rgb, self.upsample, model="hog")
+        return [(box, 1.0) for box in boxes]
+
+
+class DlibDetector(FaceDetector):
+    """
+    dlib's frontal face detector, run with scores
+
+    The detector's SVM score is used as the confidence. Boxes scoring below
+    the threshold are dropped. The scores are margins around 0, not
+    probabilities, so this backend defaults to a threshold of 0.0.
+    """
+
+    name = "dlib"
+
+    def __init__(self, confidence=0.0, upsample=1):
+        super().__init__(confidence)
+        import dlib
+        self.upsample = upsample
+        self._detector = dlib.get_frontal_face_detector()
+
+    def detect(self, rgb):
+        rects, scores, _ = self._detector.run(rgb, self.upsample, self.confidence)
+        height, width = rgb.shape[:2]
+        return [
+            ((max(0, r.top()), min(width, r.right()), min(height, r.bottom()), max(0, r.left())), float(score))
+            for r, score in zip(rects, scores)
+        ]
+
+
+class DnnDetector(FaceDetector):
+    """
+    OpenCV DNN detector using the res10 300x300 SSD
+
+    The network definition ships in face_detector/deploy.prototxt; the
+    res10_300x300_ssd_iter_140000.caffemodel weights go next to it (or
+    point DNN_WEIGHTS_PATH at them). The network always runs on a 300x300
+    blob, so its cost barely depends on frame size. On large frames that
+    makes it much faster than HOG.
+    """
+
+    name = "dnn"
+
+    def __init__(self, confidence=FACE_DETECTOR_CONFIDENCE, prototxt=DNN_PROTOTXT_PATH, weights=DNN_WEIGHTS_PATH):
+        super().__init__(confidence)
+        import cv2
+        self._cv2 = cv2
+        self._net = cv2.dnn.readNetFromCaffe(prototxt, weights)
+        # A cv2.dnn.Net holds its input between setInput and forward, so calls must not interleave
+        self._lock = threading.Lock()
+
+    def detect(self, rgb):
+        height, width = rgb.shape[:2]
+        # The model was trained on BGR input; swapRB flips our RGB frames back
+        blob = self._cv2.dnn.blobFromImage(rgb, 1.0, (300, 300), (104.0, 177.0, 123.0), swapRB=True)
+        with self._lock:
+            self._net.setInput(blob)
+            detections = self._net.forward()[0, 0]
+
+        results = []
+        for detection in detections[detections[:, 2] >= self.confidence]:
+            left, top, right, bottom = (detection[3:7] * np.array([width, height, width, height])).astype(int)
+            left, top = max(0, left), max(0, top)
+            right, bottom = min(width, right), min(height, bottom)
+            if right > left and bottom > top:
+                results.append(((int(top), int(right), int(bottom), int(left)), float(detection[2])))
+        return results
+
+
+DETECTORS = {
+    HogDetector.name: HogDetector,
+    DlibDetector.name: DlibDetector,
+    DnnDetector.name: DnnDetector,
+}
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def get_face_detector(name=None):
+    """
+    Return the configured detector backend, created once per process
+
+    Args:
+        name: Backend name; defaults to the FACE_DETECTOR setting
+    """
+    name = name or FACE_DETECTOR
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown face detector '{name}', expected one of: {', '.join(DETECTORS)}")
+    detector = _detectors.get(name)
+    if detector is None:
+        with _detectors_lock:
+            detector = _detectors.get(name)
+            if detector is None:
+                detector = DETECTORS[name]()
+                _detectors[name] = detector
+                logger.info(f"Using '{name}' face detector")
+    return detector
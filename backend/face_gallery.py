@@ -0,0 +1,190 @@
+import threading
+import logging
+
+import numpy as np
+
+from encoding_storage import decode_face_encoding
+
+logger = logging.getLogger(__name__)
+
+ENCODING_DIM = 128
+
+
+class FaceGallery:
+    """
+    In-memory index of every registered user's face encoding.
+
+    Encodings live in one contiguous float32 matrix (one row per user) with an
+    id -> row map, so a batch of probe encodings can be matched against the
+    whole gallery with a single vectorized distance computation.
+    """
+
+    def __init__(self, dim=ENCODING_DIM, initial_capacity=256):
+        self.dim = dim
+        self._matrix = np.zeros((max(1, initial_capacity), dim), dtype=np.float32)
+        self._sq_norms = np.zeros(max(1, initial_capacity), dtype=np.float32)
+        self._ids = []
+        self._rows = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, user_id):
+        return str(user_id) in self._rows
+
+    def _grow(self, min_capacity):
+        capacity = self._matrix.shape[0]
+        while capacity < min_capacity:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        sq_norms[:len(self._ids)] = self._sq_norms[:len(self._ids)]
+        self._matrix = matrix
+        self._sq_norms = sq_norms
+
+    def add(self, user_id, encoding):
+        """
+        Add a user's encoding, replacing any encoding already stored for them
+
+        Args:
+            user_id: User id (ObjectId or str)
+            encoding: 128-d face encoding (stored Binary blob, list or numpy array)
+        """
+        vector = decode_face_encoding(encoding).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f'Expected a {self.dim}-d encoding, got {vector.shape[0]}')
+
+        user_id = str(user_id)
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                row = len(self._ids)
+                if row >= self._matrix.shape[0]:
+                    self._grow(row + 1)
+                self._ids.append(user_id)
+                self._rows[user_id] = row
+            self._matrix[row] = vector
+            self._sq_norms[row] = np.dot(vector, vector)
+
+    def remove(self, user_id):
+        """
+        Remove a user's encoding from the gallery
+
+        The last row is moved into the freed slot so the matrix stays dense.
+
+        Returns:
+            bool: True if the user was present
+        """
+        user_id = str(user_id)
+        with self._lock:
+            row = self._rows.pop(user_id, None)
+            if row is None:
+                return False
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._sq_norms[row] = self._sq_norms[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._ids = []
+            self._rows = {}
+
+    def load(self, users_collection):
+        """
+        (Re)build the gallery from every active user that has a face encoding
+
+        Args:
+            users_collection: pymongo collection holding user documents
+
+        Returns:
+            int: Number of encodings loaded
+        """
+        cursor = users_collection.find(
+            {'face_encoding': {'$exists': True}, 'status': {'$in': ['active', None]}},
+            {'face_encoding': 1}
+        )
+        with self._lock:
+            self.clear()
+            for user in cursor:
+                try:
+                    self.add(user['_id'], user['face_encoding'])
+                except ValueError as e:
+                    logger.warning(f"Skipping face encoding for user {user['_id']}: {str(e)}")
+            logger.info(f"Face gallery loaded with {len(self)} encodings")
+            return len(self)
+
+    def distances(self, probes):
+        """
+        Euclidean distance from each probe encoding to every gallery encoding
+
+        Args:
+            probes: Array-like of shape (n, 128) or a single 128-d encoding
+
+        Returns:
+            numpy.ndarray: (n, len(gallery)) float32 distance matrix
+        """
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            size = len(self._ids)
+            matrix = self._matrix[:size]
+            sq_norms = self._sq_norms[:size]
+            # |p - g|^2 = |p|^2 + |g|^2 - 2 p.g, computed for the whole batch at once
+            sq = (probes * probes).sum(axis=1)[:, None] + sq_norms[None, :] - 2.0 * probes @ matrix.T
+        np.maximum(sq, 0, out=sq)
+        return np.sqrt(sq)
+
+    def query(self, probes, k=1, tolerance=None):
+        """
+        Find the k nearest gallery users for each probe encoding
+
+        Args:
+            probes: Array-like of shape (n, 128) or a single 128-d encoding
+            k: Number of neighbours to return per probe
+            tolerance: If given, drop neighbours further away than this
+
+        Returns:
+            list: One list per probe of (user_id, distance) tuples, nearest first
+        """
+        with self._lock:
+            ids = list(self._ids)
+            dist = self.distances(probes)
+
+        if not ids:
+            return [[] for _ in range(dist.shape[0])]
+
+        k = min(k, len(ids))
+        if k < len(ids):
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.tile(np.arange(len(ids)), (dist.shape[0], 1))
+        order = np.take_along_axis(dist, nearest, axis=1).argsort(axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+
+        results = []
+        for i, row in enumerate(nearest):
+            matches = []
+            for j in row:
+                distance = float(dist[i, j])
+                if tolerance is not None and distance > tolerance:
+                    break
+                matches.append((ids[j], distance))
+            results.append(matches)
+        return results
+
+    def identify(self, encoding, tolerance=0.45):
+        """
+        Return the closest user for a single encoding, or None if nobody is within tolerance
+
+        Returns:
+            tuple or None: (user_id, distance)
+        """
+        matches = self.query(encoding, k=1, tolerance=tolerance)[0]
+        return matches[0] if matches else None
@@ -0,0 +1,316 @@
+import os
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from metrics import collect_stages, record_stages, stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Every server process (e.g. each gunicorn worker) starts its own pool, so
+# FACE_POOL_WORKERS is per process: size it as cores / server processes.
+# FACE_POOL_WORKERS=0 runs face jobs inline on the request thread (useful for debugging)
+FACE_POOL_WORKERS = int(os.environ.get("FACE_POOL_WORKERS", min(2, os.cpu_count() or 1)))
+FACE_POOL_MAX_PENDING = int(os.environ.get("FACE_POOL_MAX_PENDING", max(1, FACE_POOL_WORKERS) * 4))
+# Bulk enrollment may hold at most this many of the FACE_POOL_MAX_PENDING
+# slots, so logins and registrations still get through during onboarding
+FACE_POOL_BULK_MAX_PENDING = int(os.environ.get("FACE_POOL_BULK_MAX_PENDING", max(1, FACE_POOL_MAX_PENDING // 2)))
+FACE_POOL_TIMEOUT = float(os.environ.get("FACE_POOL_TIMEOUT", 30))
+FACE_POOL_RETRY_AFTER = int(os.environ.get("FACE_POOL_RETRY_AFTER", 5))
+# The parent already runs Mongo monitor and mask-batcher threads, which fork() would
+# copy mid-flight, so workers are started from a clean process instead
+FACE_POOL_START_METHOD = os.environ.get("FACE_POOL_START_METHOD", "forkserver")
+
+
+class FacePoolError(Exception):
+    """Base class for errors raised when a face job cannot be completed"""
+
+
+class FacePoolBusy(FacePoolError):
+    """Raised when the pool already has FACE_POOL_MAX_PENDING jobs queued"""
+
+    def __init__(self, retry_after=FACE_POOL_RETRY_AFTER):
+        super().__init__("Face processing is busy, please retry shortly.")
+        self.retry_after = retry_after
+
+
+class FacePoolTimeout(FacePoolError):
+    """Raised when a face job does not finish within FACE_POOL_TIMEOUT"""
+
+    def __init__(self):
+        super().__init__("Face processing timed out, please retry.")
+        self.retry_after = FACE_POOL_RETRY_AFTER
+
+
+# ---------------------- Child Process Jobs ---------------------- #
+# These run inside the pool workers, so they must be importable top-level functions.
+
+def _init_worker():
+    # Importing face_recognition loads the ResNet encoder, and the detector
+    # backend is built here, once per child instead of once per job.
+    import face_recognition  # noqa: F401
+    from face_detectors import get_face_detector
+    get_face_detector()
+    logger.info(f"Face pool worker {os.getpid()} ready")
+
+
+def encode_upload(data):
+    """
+    Detect and encode the single face in an uploaded image's raw bytes
+
+    The result carries the worker's stage timings under "timings"; pass
+    them to metrics.record_stages() in the parent.
+    """
+    from face_utils import detect_and_encode_face
+    with collect_stages() as timings:
+        result = detect_and_encode_face(data)
+    result["timings"] = timings
+    return result
+
+
+def locate_and_encode(rgb):
+    """Find all faces in an RGB frame and return (locations, encodings, stage timings)"""
+    import face_recognition
+    from face_detectors import get_face_detector
+    with collect_stages() as timings:
+        with stage_timer("detect"):
+            locations = get_face_detector().locations(rgb)
+        if not locations:
+            return [], [], timings
+        with stage_timer("encode"):
+            encodings = face_recognition.face_encodings(rgb, locations)
+    return locations, encodings, timings
+
+
+def locate_and_encode_batch(rgb_frames):
+    """locate_and_encode over several frames in one job"""
+    return [locate_and_encode(rgb) for rgb in rgb_frames]
+
+
+# ---------------------- Pool ---------------------- #
+
+def _call_capturing(fn, arg):
+    try:
+        return fn(arg)
+    except Exception as e:
+        return e
+
+
+class FacePool:
+    """
+    Process pool for CPU-bound face detection and encoding
+
+    Keeps HOG detection and the ResNet encoder off the Flask request
+    threads. At most max_pending jobs may be queued or running; past that,
+    a new request's first submission raises FacePoolBusy straight away
+    instead of letting requests pile up behind the pool.
+
+    If a worker dies (a dlib segfault, the OOM killer), the executor is
+    broken for good; it is thrown away, the next submission starts a fresh
+    one, and run()/map() retry the affected jobs once.
+    """
+
+    def __init__(self, workers=FACE_POOL_WORKERS, max_pending=FACE_POOL_MAX_PENDING, timeout=FACE_POOL_TIMEOUT,
+                 bulk_max_pending=FACE_POOL_BULK_MAX_PENDING):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._bulk_slots = threading.BoundedSemaphore(max(1, min(bulk_max_pending, max_pending)))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, initializer=_init_worker, mp_context=_mp_context())
+        return self._executor
+
+    def _discard_executor(self, executor):
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        logger.warning("Face pool worker died, restarting the pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        """
+        Queue a job on the pool
+
+        Raises:
+            FacePoolBusy: If max_pending jobs are already queued or running
+
+        Returns:
+            concurrent.futures.Future
+        """
+        if not self._slots.acquire(blocking=False):
+            raise FacePoolBusy()
+        return self._submit_acquired(fn, *args)
+
+    def _submit_acquired(self, fn, *args):
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # Broke since the last job finished: start a fresh executor
+                self._discard_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda done: self._job_done(executor, done))
+        return future
+
+    def _job_done(self, executor, future):
+        self._slots.release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard_executor(executor)
+
+    def _retry_broken(self, call):
+        try:
+            return call()
+        except BrokenProcessPool:
+            return call()
+
+    def run(self, fn, *args):
+        """Run one job and wait for its result, bounded by the pool timeout"""
+        if self.workers <= 0:
+            return fn(*args)
+        return self._retry_broken(lambda: self.result(self.submit(fn, *args)))
+
+    def map(self, fn, items):
+        """
+        Run fn over items in parallel and return the results in order
+
+        Back-pressure applies per call, not per item: FacePoolBusy is only
+        raised if there is no slot for the first item. Once that is taken,
+        the rest of the batch waits for slots, within the same deadline.
+        """
+        items = list(items)
+        if self.workers <= 0:
+            return [fn(item) for item in items]
+        if not items:
+            return []
+        return self._retry_broken(lambda: self._map(fn, items))
+
+    def _map(self, fn, items):
+        # One deadline for the whole batch, not one timeout per item
+        deadline = time.monotonic() + self.timeout
+        futures = [self.submit(fn, items[0])]
+        try:
+            for item in items[1:]:
+                if not self._slots.acquire(timeout=max(0, deadline - time.monotonic())):
+                    raise FacePoolTimeout()
+                futures.append(self._submit_acquired(fn, item))
+            return [self.result(future, max(0, deadline - time.monotonic())) for future in futures]
+        except FacePoolTimeout:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def map_throttled(self, fn, items):
+        """
+        Run fn over a large batch without tripping back-pressure
+
+        Instead of raising FacePoolBusy, waits for a free slot before each
+        submission. A batch never holds more than bulk_max_pending slots, so
+        the rest stay free for interactive requests. Each item's exception is returned in place of its result, so one
+        bad item doesn't sink the whole batch.
+
+        Returns:
+            list: Result or exception for each item, in order
+        """
+        if self.workers <= 0:
+            return [_call_capturing(fn, item) for item in items]
+
+        items = list(items)
+        results = self._map_throttled(fn, items)
+        broken = [i for i, result in enumerate(results) if isinstance(result, BrokenProcessPool)]
+        if broken:
+            for i, result in zip(broken, self._map_throttled(fn, [items[i] for i in broken])):
+                results[i] = result
+        return results
+
+    def _map_throttled(self, fn, items):
+        futures = []
+        for item in items:
+            if not self._bulk_slots.acquire(timeout=self.timeout):
+                futures.append(None)
+                continue
+            if not self._slots.acquire(timeout=self.timeout):
+                self._bulk_slots.release()
+                futures.append(None)
+                continue
+            try:
+                future = self._submit_acquired(fn, item)
+            except Exception as e:
+                self._bulk_slots.release()
+                if not isinstance(e, BrokenProcessPool):
+                    raise
+                futures.append(e)
+                continue
+            future.add_done_callback(lambda _: self._bulk_slots.release())
+            futures.append(future)
+
+        results = []
+        for future in futures:
+            if future is None:
+                results.append(FacePoolTimeout())
+            elif isinstance(future, Exception):
+                results.append(future)
+            else:
+                results.append(_call_capturing(self.result, future))
+        return results
+
+    def result(self, future, timeout=None):
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise FacePoolTimeout()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _mp_context():
+    method = FACE_POOL_START_METHOD
+    if method not in multiprocessing.get_all_start_methods():
+        method = "spawn"  # forkserver isn't available on Windows
+    return multiprocessing.get_context(method)
+
+
+face_pool = FacePool()
+
+
+def encode_frames(frames):
+    """
+    Detect and encode faces across a batch of BGR frames on the pool
+
+    The frames are split into at most one chunk per worker, so a request
+    takes a handful of pool jobs however many frames it uploaded.
+
+    Returns:
+        list: One (locations, encodings) tuple per frame
+    """
+    rgb_frames = [np.ascontiguousarray(frame[:, :, ::-1]) for frame in frames]
+    chunk_size = max(1, -(-len(rgb_frames) // max(1, face_pool.workers)))
+    chunks = [rgb_frames[i:i + chunk_size] for i in range(0, len(rgb_frames), chunk_size)]
+    detections = []
+    for chunk in face_pool.map(locate_and_encode_batch, chunks):
+        for locations, encodings, timings in chunk:
+            record_stages(timings)
+            detections.append((locations, encodings))
+    return detections
@@ -1,13 +1,73 @@
-import face_recognition
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageOps
 import io
+import os
 import logging
+from face_detectors import get_face_detector
+from metrics import stage_timer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+MIN_IMAGE_EDGE = 200
+# Uploads are downscaled so their longest edge is at most this many pixels before detection
+MAX_IMAGE_EDGE = int(os.environ.get("FACE_IMAGE_MAX_EDGE", 1024))
+
+def ingest_face_image(image_file, max_edge=MAX_IMAGE_EDGE):
+    """
+    Validate and decode an uploaded image in a single pass
+
+    JPEGs are decoded with draft mode, so the decoder itself scales them
+    down instead of producing a full-resolution bitmap first. EXIF
+    orientation is applied, and the result is downscaled so its longest edge
+    is at most max_edge.
+
+    Args:
+        image_file: File object (or bytes) containing the uploaded image
+        max_edge: Longest edge of the returned array, in pixels
+
+    Returns:
+        dict: Contains success status, the RGB numpy array, the original
+              dimensions, and any error messages
+    """
+    image_data = image_file if isinstance(image_file, bytes) else image_file.read()
+
+    if len(image_data) > MAX_FILE_SIZE:
+        return {
+            'success': False,
+            'error': 'Image file size must be less than 5MB'
+        }
+
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        # Dimension check uses the header, before anything is decoded
+        width, height = image.size
+        if width < MIN_IMAGE_EDGE or height < MIN_IMAGE_EDGE:
+            return {
+                'success': False,
+                'error': 'Image dimensions must be at least 200x200 pixels'
+            }
+
+        image.draft('RGB', (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+        if max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.BILINEAR)
+    except Exception:
+        return {
+            'success': False,
+            'error': 'Invalid image file format'
+        }
+
+    return {
+        'success': True,
+        'image': np.asarray(image),
+        'width': width,
+        'height': height
+    }
+
 def detect_and_encode_face(image_file):
     """
     Detect face in uploaded image and extract face encoding
@@ -19,15 +79,16 @@ def detect_and_encode_face(image_file):
         dict: Contains success status, face encoding, and any error messages
     """
     try:
-        # Read image file
-        image_data = image_file.read()
-        image = Image.open(io.BytesIO(image_data))
-        
-        # Convert PIL image to numpy array
-        image_array = np.array(image)
+        # Decode once, already validated and downscaled
+        with stage_timer('decode'):
+            ingested = ingest_face_image(image_file)
+        if not ingested['success']:
+            return ingested
+        image_array = ingested['image']
         
         # Find face locations in the image
-        face_locations = face_recognition.face_locations(image_array)
+        with stage_timer('detect'):
+            face_locations = get_face_detector().locations(image_array)
         
         if len(face_locations) == 0:
             return {
@@ -42,7 +103,9 @@ def detect_and_encode_face(image_file):
             }
         
         # Extract face encodings
-        face_encodings = face_recognition.face_encodings(image_array, face_locations)
+        import face_recognition
+        with stage_timer('encode'):
+            face_encodings = face_recognition.face_encodings(image_array, face_locations)
         
         if len(face_encodings) == 0:
             return {
@@ -78,6 +141,8 @@ def compare_faces(known_encoding, unknown_encoding, tolerance=0.6):
     Returns:
         dict: Contains match result and confidence score
     """
+    import face_recognition
+
     try:
         # Convert lists back to numpy arrays
         known_array = np.array(known_encoding)
@@ -117,38 +182,10 @@ def validate_face_image(image_file):
         dict: Contains validation result and any error messages
     """
     try:
-        # Check file size (max 5MB)
-        image_file.seek(0, 2)  # Seek to end
-        file_size = image_file.tell()
-        image_file.seek(0)  # Reset to beginning
-        
-        if file_size > 5 * 1024 * 1024:  # 5MB
-            return {
-                'success': False,
-                'error': 'Image file size must be less than 5MB'
-            }
-        
-        # Check if it's a valid image
-        try:
-            image = Image.open(image_file)
-            image.verify()
-            image_file.seek(0)  # Reset file pointer after verify
-        except Exception:
-            return {
-                'success': False,
-                'error': 'Invalid image file format'
-            }
-        
-        # Check image dimensions (minimum requirements)
-        image = Image.open(image_file)
-        width, height = image.size
+        result = ingest_face_image(image_file)
         image_file.seek(0)  # Reset file pointer
-        
-        if width < 200 or height < 200:
-            return {
-                'success': False,
-                'error': 'Image dimensions must be at least 200x200 pixels'
-            }
+        if not result['success']:
+            return result
         
         return {
             'success': True,
@@ -160,4 +197,4 @@ def validate_face_image(image_file):
         return {
             'success': False,
             'error': f'Error validating image: {str(e)}'
-        }
\ No newline at end of file
+        }
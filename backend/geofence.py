@@ -0,0 +1,150 @@
+import os
+import math
+
+import numpy as np
+
+from database import get_db
+from settings_cache import TTLCache, SETTINGS_CACHE_TTL, get_admin_settings
+
+# ---------------------- Office Index ---------------------- #
+# Every office location is loaded into NumPy arrays once, so checking a
+# punch-in position against all sites is a single vectorized haversine.
+# Offices come from each department's office_location (or office_locations
+# list) plus the global office_location in admin settings. Each may carry
+# its own "radius" in metres; otherwise GEOFENCE_DEFAULT_RADIUS_M applies.
+
+GEOFENCE_DEFAULT_RADIUS_M = float(os.environ.get("GEOFENCE_DEFAULT_RADIUS_M", 200))
+# Results are cached per position rounded to ~1 m, for retries and job polling
+GEOFENCE_CACHE_TTL = float(os.environ.get("GEOFENCE_CACHE_TTL", 10))
+GEOFENCE_CACHE_PRECISION = 5
+
+EARTH_RADIUS_M = 6371008.8
+
+
+class OfficeIndex:
+    """Office coordinates and radii as arrays, for distance checks against all offices at once"""
+
+    def __init__(self, offices):
+        self.offices = offices
+        coords = np.radians(np.array([[o["lat"], o["lng"]] for o in offices], dtype=np.float64).reshape(-1, 2))
+        self._lat = coords[:, 0]
+        self._lng = coords[:, 1]
+        self._cos_lat = np.cos(self._lat)
+        self._radius = np.array([o["radius"] for o in offices], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.offices)
+
+    def distances(self, lat, lng):
+        """Great-circle distance in metres from (lat, lng) to every office"""
+        lat, lng = math.radians(lat), math.radians(lng)
+        a = np.sin((self._lat - lat) / 2) ** 2 + self._cos_lat * math.cos(lat) * np.sin((self._lng - lng) / 2) ** 2
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def locate(self, lat, lng):
+        """
+        Find the office whose geofence best contains (lat, lng)
+
+        Returns:
+            tuple: (office, distance_m, inside), where office is the one with
+                   the most room to spare inside its radius (or, if outside
+                   all of them, the one closest to its edge). (None, None,
+                   False) when there are no offices.
+        """
+        if not self.offices:
+            return None, None, False
+        distances = self.distances(lat, lng)
+        overshoot = distances - self._radius
+        i = int(np.argmin(overshoot))
+        return self.offices[i], float(distances[i]), bool(overshoot[i] <= 0)
+
+
+def _office(location, office_id, name, department_id):
+    try:
+        lat, lng = float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return {
+        "id": office_id,
+        "name": name,
+        "department_id": department_id,
+        "lat": lat,
+        "lng": lng,
+        "radius": float(location.get("radius", GEOFENCE_DEFAULT_RADIUS_M)),
+    }
+
+
+def load_offices(db):
+    """Every configured office location, skipping malformed entries"""
+    offices = []
+    for department in db["departments"].find({}, {"name": 1, "office_location": 1, "office_locations": 1}):
+        locations = department.get("office_locations") or [department.get("office_location")]
+        for i, location in enumerate(locations):
+            if not location:
+                continue
+            office_id = f"{department['_id']}:{i}" if len(locations) > 1 else str(department["_id"])
+            office = _office(location, office_id, location.get("name", department.get("name")), department["_id"])
+            if office:
+                offices.append(office)
+
+    office = _office(get_admin_settings().get("office_location") or {}, "main", "Main office", None)
+    if office:
+        offices.append(office)
+    return offices
+
+
+_index_cache = TTLCache(SETTINGS_CACHE_TTL)
+_result_cache = TTLCache(GEOFENCE_CACHE_TTL, max_entries=4096)
+
+
+def get_office_index():
+    return _index_cache.get("offices", lambda: OfficeIndex(load_offices(get_db())))
+
+
+def invalidate_offices():
+    """Call after changing office locations so the next check rebuilds the index"""
+    _index_cache.invalidate()
+    _result_cache.invalidate()
+
+
+def parse_location(location):
+    """
+    Validate a client-supplied {"lat": ..., "lng": ...}
+
+    Returns:
+        tuple: (lat, lng) as floats, or None if missing or out of range
+    """
+    if not isinstance(location, dict):
+        return None
+    try:
+        lat, lng = float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (math.isfinite(lat) and math.isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def check_location(location):
+    """
+    Check a client-supplied position against every office geofence
+
+    Returns:
+        dict: {'valid', 'inside', 'office', 'distance_m'}; valid is False
+              when the position is missing or malformed
+    """
+    coords = parse_location(location)
+    if coords is None:
+        return {"valid": False, "inside": False, "office": None, "distance_m": None}
+
+    def locate():
+        office, distance, inside = get_office_index().locate(*coords)
+        return {
+            "valid": True,
+            "inside": inside,
+            "office": {"id": office["id"], "name": office["name"]} if office else None,
+            "distance_m": round(distance, 1) if distance is not None else None,
+        }
+
+    key = (round(coords[0], GEOFENCE_CACHE_PRECISION), round(coords[1], GEOFENCE_CACHE_PRECISION))
+    return _result_cache.get(key, locate)
@@ -0,0 +1,55 @@
+from datetime import date, datetime
+
+import numpy as np
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+# msgspec encodes straight from the document in one C pass. Without it we
+# fall back to the standard library encoder with the same type handling.
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _encode_default(value):
+    """Types the encoder doesn't know about natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return DefaultJSONProvider.default(value)
+
+
+_encoder = msgspec.json.Encoder(enc_hook=_encode_default) if msgspec else None
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that serializes Mongo documents as they come out of pymongo
+
+    ObjectId becomes its hex string, datetime/date become ISO 8601 strings
+    and NumPy scalars/arrays become plain numbers/lists, so routes can pass
+    documents straight to jsonify without converting them first.
+    """
+
+    default = staticmethod(_encode_default)
+
+    def dumps(self, obj, **kwargs):
+        if _encoder is not None and not kwargs:
+            return _encoder.encode(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if _encoder is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        body = _encoder.encode(obj)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = msgspec.json.format(body, indent=2)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,101 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MASK_INPUT_SIZE = (224, 224)
+
+
+def preprocess_face(face_img):
+    """Resize a BGR face crop to the mask model's input and scale it to [0, 1]"""
+    face_resized = cv2.resize(face_img, MASK_INPUT_SIZE)
+    return face_resized.astype(np.float32) / 255.0
+
+
+def run_model(model, batch):
+    """
+    Call the Keras model directly on a batch
+
+    model(x, training=False) runs the compiled graph without the per-call
+    setup that model.predict() does (building a data adapter, callbacks,
+    a progress bar), which dominates the cost for small batches.
+    """
+    return np.asarray(model(batch, training=False))
+
+
+class MaskBatcher:
+    """
+    Shared mask-detection inference service
+
+    Face crops submitted from concurrent verifications are queued and run
+    through the model together in batches of up to max_batch_size. A batch
+    is dispatched as soon as it is full or max_wait_ms after its first item
+    arrived, whichever comes first. Each caller gets its own result back
+    through a Future.
+    """
+
+    def __init__(self, model_loader, max_batch_size=16, max_wait_ms=5):
+        self._model_loader = model_loader
+        self._model = None
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._model = self._model_loader()
+                self._worker = threading.Thread(target=self._run, name="mask-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, face_img):
+        """
+        Queue a BGR face crop for inference
+
+        Returns:
+            Future: Resolves to the model's prediction row for this crop
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((preprocess_face(face_img), future))
+        return future
+
+    def predict(self, face_img, timeout=None):
+        return self.submit(face_img).result(timeout=timeout)
+
+    def _collect_batch(self):
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect_batch()
+            futures = [future for _, future in items]
+            try:
+                predictions = run_model(self._model, np.stack([face for face, _ in items]))
+            except Exception as e:
+                logger.error(f"Mask inference failed for batch of {len(items)}: {str(e)}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, prediction in zip(futures, predictions):
+                future.set_result(prediction)
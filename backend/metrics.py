@@ -0,0 +1,191 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+from flask import request
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# ---------------------- Settings ---------------------- #
+# Requests slower than SLOW_REQUEST_MS are logged with their stage breakdown
+# (0 turns the log off). Histograms are always collected; each observation
+# is a bisect and a short lock, a few microseconds.
+
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 0))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+# ---------------------- Histograms ---------------------- #
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    """Prometheus histogram with fixed label names, rendered in the text exposition format"""
+
+    def __init__(self, name, documentation, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        for labelvalues, counts, total, count in sorted(snapshot):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues))
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return "\n".join(lines)
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Flask request latency", ("method", "route", "status"))
+STAGE_SECONDS = Histogram(
+    "face_pipeline_stage_seconds", "Time spent in each face pipeline stage", ("stage",))
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("command", "outcome"))
+
+HISTOGRAMS = [HTTP_REQUEST_SECONDS, STAGE_SECONDS, MONGO_COMMAND_SECONDS]
+
+
+# ---------------------- Stage Timers ---------------------- #
+# Stages: decode, detect, encode, match, mask, landmarks, db_write.
+# Timings are added to the current request's breakdown (for the slow
+# request log) as well as the stage histogram. Code running in a face pool
+# worker wraps itself in collect_stages() and returns the timings, and the
+# parent process records them with record_stages().
+
+_local = threading.local()
+
+
+def record_stage(stage, seconds):
+    collector = getattr(_local, "collector", None)
+    if collector is not None:
+        collector[stage] = collector.get(stage, 0.0) + seconds
+        return
+    STAGE_SECONDS.observe(seconds, stage)
+    breakdown = getattr(_local, "breakdown", None)
+    if breakdown is not None:
+        breakdown[stage] = breakdown.get(stage, 0.0) + seconds
+
+
+def record_stages(timings):
+    for stage, seconds in (timings or {}).items():
+        record_stage(stage, seconds)
+
+
+@contextmanager
+def stage_timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def collect_stages():
+    """Gather stage timings in a dict instead of recording them, e.g. to send back from a worker process"""
+    previous = getattr(_local, "collector", None)
+    _local.collector = timings = {}
+    try:
+        yield timings
+    finally:
+        _local.collector = previous
+
+
+# ---------------------- Mongo Commands ---------------------- #
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command; the time also counts towards the request's "mongo" stage"""
+
+    def started(self, event):
+        pass
+
+    def _record(self, event, outcome):
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMAND_SECONDS.observe(seconds, event.command_name, outcome)
+        breakdown = getattr(_local, "breakdown", None)
+        if breakdown is not None:
+            breakdown["mongo"] = breakdown.get("mongo", 0.0) + seconds
+
+    def succeeded(self, event):
+        self._record(event, "ok")
+
+    def failed(self, event):
+        self._record(event, "error")
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+# ---------------------- Flask ---------------------- #
+
+def _before_request():
+    _local.breakdown = {}
+    _local.request_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = getattr(_local, "request_start", None)
+    if start is None:
+        return response
+    seconds = time.perf_counter() - start
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_REQUEST_SECONDS.observe(seconds, request.method, route, str(response.status_code))
+
+    breakdown = _local.breakdown
+    if SLOW_REQUEST_MS and seconds * 1000 >= SLOW_REQUEST_MS:
+        stages = " ".join(f"{stage}={value * 1000:.1f}ms" for stage, value in sorted(breakdown.items(), key=lambda kv: -kv[1]))
+        logger.warning(f"Slow request {request.method} {route} {response.status_code} took {seconds * 1000:.1f}ms [{stages or 'no stages'}]")
+    _local.request_start = None
+    _local.breakdown = None
+    return response
+
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+
+def render_metrics(pool_snapshot=None):
+    """All metrics in the Prometheus text format"""
+    parts = [histogram.render() for histogram in HISTOGRAMS]
+    if pool_snapshot:
+        gauges = [
+            ("mongo_pool_max_connections", "gauge", pool_snapshot["max_pool_size"]),
+            ("mongo_pool_open_connections", "gauge", pool_snapshot["open"]),
+            ("mongo_pool_checked_out_connections", "gauge", pool_snapshot["checked_out"]),
+            ("mongo_pool_connections_created_total", "counter", pool_snapshot["created_total"]),
+            ("mongo_pool_checkout_failures_total", "counter", pool_snapshot["checkout_failures_total"]),
+            ("mongo_pool_clears_total", "counter", pool_snapshot["pool_clears_total"]),
+        ]
+        for name, kind, value in gauges:
+            parts.append(f"# TYPE {name} {kind}\n{name} {value}")
+    return "\n".join(parts) + "\n"
@@ -0,0 +1,92 @@
+import base64
+from datetime import datetime
+
+from bson import json_util, ObjectId
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Types a sort-key value may have in a cursor. Anything else (notably a
+# dict, which Mongo would read as an operator like {"$ne": null}) is rejected.
+CURSOR_VALUE_TYPES = (str, int, float, ObjectId, datetime, type(None))
+
+
+class InvalidCursor(ValueError):
+    """Raised when an 'after' token can't be decoded"""
+
+
+def _get_field(doc, field):
+    for part in field.split('.'):
+        doc = doc.get(part) if isinstance(doc, dict) else None
+    return doc
+
+
+def encode_cursor(doc, sort):
+    """Opaque token holding the sort-key values of the last document on a page"""
+    values = [_get_field(doc, field) for field, _ in sort]
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, sort):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise InvalidCursor('Invalid pagination cursor')
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursor('Invalid pagination cursor')
+    if not all(isinstance(value, CURSOR_VALUE_TYPES) and not isinstance(value, bool) for value in values):
+        raise InvalidCursor('Invalid pagination cursor')
+    return values
+
+
+def _after_filter(sort, values):
+    """
+    Filter for documents strictly after the cursor in sort order
+
+    For sort keys (a, b, _id) this is a > va OR (a = va AND b > vb) OR
+    (a = va AND b = vb AND _id > vid), with > flipped to < for descending
+    keys. With a matching compound index each page is a bounded index range
+    scan, however deep the page.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {'$gt' if direction > 0 else '$lt': values[i]}
+        clauses.append(clause)
+    return {'$or': clauses}
+
+
+def page_size_arg(args):
+    try:
+        size = int(args.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        size = DEFAULT_PAGE_SIZE
+    return min(MAX_PAGE_SIZE, max(1, size))
+
+
+def keyset_page(collection, query, sort, projection=None, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page using keyset (cursor) pagination
+
+    Args:
+        collection: pymongo collection
+        query: Filter for the whole listing
+        sort: List of (field, direction); must end with ('_id', direction) so the order is total
+        projection: Optional projection; must not drop the sort fields
+        after: Token from the previous page's next_cursor, or None for the first page
+        page_size: Documents per page
+
+    Raises:
+        InvalidCursor: If after can't be decoded
+
+    Returns:
+        tuple: (documents, next_cursor) where next_cursor is None on the last page
+    """
+    if after:
+        query = {'$and': [query, _after_filter(sort, decode_cursor(after, sort))]}
+
+    docs = list(collection.find(query, projection).sort(sort).limit(page_size + 1))
+    if len(docs) <= page_size:
+        return docs, None
+    docs = docs[:page_size]
+    return docs, encode_cursor(docs[-1], sort)
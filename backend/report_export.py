@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import zlib
+from datetime import date, datetime
+
+# pyarrow is only needed for the parquet/arrow report formats
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Rows are pulled from Mongo this many documents at a time and flushed to the
+# client in chunks of REPORT_CHUNK_ROWS, so memory use stays flat however
+# large the report is.
+REPORT_BATCH_SIZE = int(os.environ.get('REPORT_BATCH_SIZE', 1000))
+REPORT_CHUNK_ROWS = 500
+
+REPORT_COLUMNS = [
+    'Date', 'Employee Name', 'Email',
+    'Punch In', 'Punch Out',
+    'Working Hours', 'Overtime Hours', 'Status'
+]
+
+# Only the fields the report needs are sent over the wire
+REPORT_PROJECTION = {
+    '_id': 0, 'user_id': 1, 'date': 1, 'punch_in.time': 1, 'punch_out.time': 1,
+    'working_hours': 1, 'overtime_hours': 1, 'status': 1
+}
+
+
+def report_cursor(attendance_records, query):
+    return attendance_records.find(query, REPORT_PROJECTION).sort('date', 1).batch_size(REPORT_BATCH_SIZE)
+
+
+def iter_report_rows(records, user_map):
+    """Yield one report row (in REPORT_COLUMNS order) per attendance record"""
+    for record in records:
+        user = user_map.get(record['user_id'], {})
+        yield [
+            record.get('date', ''),
+            user.get('name', 'N/A'),
+            user.get('email', 'N/A'),
+            record.get('punch_in', {}).get('time', '--'),
+            record.get('punch_out', {}).get('time', '--'),
+            record.get('working_hours', 0),
+            record.get('overtime_hours', 0),
+            record.get('status', '')
+        ]
+
+
+def stream_csv(rows):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(REPORT_COLUMNS)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % REPORT_CHUNK_ROWS == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def stream_ndjson(rows):
+    keys = [column.lower().replace(' ', '_') for column in REPORT_COLUMNS]
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps({key: _json_value(value) for key, value in zip(keys, row)}))
+        if len(chunk) >= REPORT_CHUNK_ROWS:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+def gzip_stream(chunks):
+    """Gzip a stream of text chunks incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ---------------------- Columnar Export ---------------------- #
+
+ARROW_SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('employee_name', pa.string()),
+    ('email', pa.string()),
+    ('punch_in', pa.timestamp('ms')),
+    ('punch_out', pa.timestamp('ms')),
+    ('working_hours', pa.float32()),
+    ('overtime_hours', pa.float32()),
+    ('status', pa.dictionary(pa.int8(), pa.string())),
+]) if pa else None
+
+FILE_CHUNK_SIZE = 1024 * 1024
+# Each write_batch call becomes one Parquet row group, so batch more rows than for Arrow
+PARQUET_ROW_GROUP_ROWS = 64 * 1024
+
+
+def columnar_available():
+    return pa is not None
+
+
+def _typed_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _typed_time(value):
+    return value if isinstance(value, datetime) else None
+
+
+def iter_record_batches(rows, batch_rows=REPORT_BATCH_SIZE):
+    """Turn report rows into typed Arrow record batches of up to batch_rows rows"""
+    columns = [[] for _ in ARROW_SCHEMA]
+
+    def flush():
+        arrays = [
+            pa.array(values, type=field.type) if not pa.types.is_dictionary(field.type)
+            else pa.array(values, type=pa.string()).dictionary_encode().cast(field.type)
+            for field, values in zip(ARROW_SCHEMA, columns)
+        ]
+        for values in columns:
+            values.clear()
+        return pa.RecordBatch.from_arrays(arrays, schema=ARROW_SCHEMA)
+
+    for row in rows:
+        day, name, email, punch_in, punch_out, working_hours, overtime_hours, status = row
+        columns[0].append(_typed_date(day))
+        columns[1].append(name)
+        columns[2].append(email)
+        columns[3].append(_typed_time(punch_in))
+        columns[4].append(_typed_time(punch_out))
+        columns[5].append(working_hours)
+        columns[6].append(overtime_hours)
+        columns[7].append(status or None)
+        if len(columns[0]) >= batch_rows:
+            yield flush()
+    if columns[0]:
+        yield flush()
+
+
+def stream_arrow(rows):
+    """Arrow IPC stream format: each record batch is sent as soon as it is built"""
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, ARROW_SCHEMA) as writer:
+        for batch in iter_record_batches(rows):
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+def stream_parquet(rows):
+    """
+    Parquet needs its footer written last, so row groups are spooled to a
+    temp file (kept in memory while small) and the file is streamed out
+    once complete.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+    try:
+        with pq.ParquetWriter(spool, ARROW_SCHEMA, compression='zstd') as writer:
+            for batch in iter_record_batches(rows, PARQUET_ROW_GROUP_ROWS):
+                writer.write_batch(batch)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
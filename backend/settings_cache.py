@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+import logging
+
+from pymongo.errors import PyMongoError
+
+from database import get_db
+
+logger = logging.getLogger(__name__)
+
+# Admin settings are read on every punch-in/out but change rarely, so they
+# are served from memory. An update through the API invalidates this
+# process's copy immediately; other worker processes pick it up when their
+# copy expires after SETTINGS_CACHE_TTL seconds, or straight away when
+# SETTINGS_CHANGE_STREAM=1 (needs a replica set, e.g. Atlas).
+SETTINGS_CACHE_TTL = float(os.environ.get("SETTINGS_CACHE_TTL", 30))
+SETTINGS_CHANGE_STREAM = os.environ.get("SETTINGS_CHANGE_STREAM") == "1"
+
+DEFAULT_ADMIN_SETTINGS = {
+    "late_punch_time": "10:00",
+    "mandatory_working_hours": 8,
+    "office_location": {"lat": 28.7041, "lng": 77.1025},
+    "failed_attempt_alert_threshold": 3,
+}
+
+
+class TTLCache:
+    """
+    Thread-safe key -> value cache whose entries expire after ttl seconds
+
+    Values are loaded on a miss by the loader passed to get(). Cached values
+    are shared between callers and must not be modified. A value whose load
+    overlapped an invalidate() is returned but not cached, since it may have
+    been read before the change that prompted the invalidation.
+    """
+
+    def __init__(self, ttl, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        generation = self._generation
+        value = loader()
+        with self._lock:
+            if self._generation != generation:
+                return value
+            if self.max_entries and key not in self._entries and len(self._entries) >= self.max_entries:
+                # Dicts keep insertion order, so this drops the oldest entry
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (value, now + self.ttl)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when key is None"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+settings_cache = TTLCache(SETTINGS_CACHE_TTL)
+
+
+def _load_admin_settings():
+    settings = get_db()["admin_settings"].find_one()
+    if not settings:
+        print("[WARN] No admin_settings document found, using defaults.")
+        return dict(DEFAULT_ADMIN_SETTINGS)
+    return {**DEFAULT_ADMIN_SETTINGS, **settings}
+
+
+def get_admin_settings():
+    """Current admin settings, merged over DEFAULT_ADMIN_SETTINGS"""
+    return settings_cache.get("admin_settings", _load_admin_settings)
+
+
+def invalidate_admin_settings():
+    settings_cache.invalidate("admin_settings")
+
+
+def _watch_admin_settings():
+    try:
+        with get_db()["admin_settings"].watch() as stream:
+            for _ in stream:
+                invalidate_admin_settings()
+    except PyMongoError as e:
+        # Standalone servers don't support change streams; the TTL still applies
+        logger.warning(f"Admin settings change stream stopped: {str(e)}")
+
+
+_watcher_pid = None
+_watcher_lock = threading.Lock()
+
+
+def start_settings_watcher():
+    """
+    Invalidate the settings cache on every change to admin_settings, from any process
+
+    Safe to call on every request: the watcher is started once per process
+    (threads don't survive a fork, so each server worker starts its own).
+    """
+    global _watcher_pid
+    if not SETTINGS_CHANGE_STREAM or _watcher_pid == os.getpid():
+        return
+    with _watcher_lock:
+        if _watcher_pid == os.getpid():
+            return
+        _watcher_pid = os.getpid()
+        threading.Thread(target=_watch_admin_settings, name="admin-settings-watcher", daemon=True).start()
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Face checks submitted with async=1 run here instead of on the request
+# thread. Jobs live in memory, so a client has to poll (or stream events
+# from) the same process that accepted it; finished jobs are dropped after
+# VERIFY_JOB_RETENTION seconds.
+VERIFY_JOB_WORKERS = int(os.environ.get("VERIFY_JOB_WORKERS", 4))
+VERIFY_JOB_MAX_PENDING = int(os.environ.get("VERIFY_JOB_MAX_PENDING", 32))
+VERIFY_JOB_RETENTION = float(os.environ.get("VERIFY_JOB_RETENTION", 300))
+VERIFY_JOB_RETRY_AFTER = int(os.environ.get("VERIFY_JOB_RETRY_AFTER", 2))
+# Bulk enrollments run minutes each, so they get their own small pool and
+# don't hold up queued face checks
+ENROLL_JOB_WORKERS = int(os.environ.get("ENROLL_JOB_WORKERS", 1))
+ENROLL_JOB_MAX_PENDING = int(os.environ.get("ENROLL_JOB_MAX_PENDING", 4))
+
+
+class VerificationQueueFull(Exception):
+    """Raised when a job table already has max_pending jobs queued or running"""
+
+    def __init__(self, message="Too many verification jobs in progress", retry_after=VERIFY_JOB_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class VerificationJob:
+    """
+    One face check and the attendance write that follows it
+
+    status moves queued -> running -> succeeded | failed. Every stage the
+    pipeline reports ("no_face", "blink", "verified", ...) is appended to
+    events, so pollers and event streams see the same history.
+    """
+
+    def __init__(self, owner, action):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.action = action
+        self.status = "queued"
+        self.events = []
+        self.result = None
+        self.http_status = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cond = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed")
+
+    def progress(self, stage, message):
+        with self._cond:
+            self.events.append({"seq": len(self.events) + 1, "stage": stage, "message": message, "at": time.time()})
+            self._cond.notify_all()
+
+    def finish(self, result, http_status):
+        with self._cond:
+            self.result = result
+            self.http_status = http_status
+            self.status = "succeeded" if http_status < 400 else "failed"
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def wait(self, after, timeout):
+        """
+        Block until there are events past seq `after`, the job finishes, or timeout expires
+
+        Returns:
+            list: Events with seq > after (possibly empty)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > after or self.done, timeout)
+            return self.events[after:]
+
+    def to_dict(self):
+        with self._cond:
+            latest = self.events[-1] if self.events else None
+            return {
+                "job_id": self.id,
+                "action": self.action,
+                "status": self.status,
+                "stage": latest["stage"] if latest else None,
+                "message": latest["message"] if latest else None,
+                "result": self.result,
+                "http_status": self.http_status,
+            }
+
+
+class VerificationJobs:
+    """In-memory job table in front of a thread pool"""
+
+    def __init__(self, workers=VERIFY_JOB_WORKERS, max_pending=VERIFY_JOB_MAX_PENDING, retention=VERIFY_JOB_RETENTION,
+                 kind="verification", failure="Face verification failed"):
+        self.max_pending = max_pending
+        self.retention = retention
+        self.kind = kind
+        self.failure = failure
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{kind}-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner, action, fn):
+        """
+        Queue fn(job) and return the job straight away
+
+        fn must return (result, http_status); an exception fails the job
+        with a 500.
+
+        Raises:
+            VerificationQueueFull: If max_pending jobs are already unfinished
+        """
+        with self._lock:
+            self._prune()
+            pending = sum(1 for job in self._jobs.values() if not job.done)
+            if pending >= self.max_pending:
+                raise VerificationQueueFull(f"Too many {self.kind} jobs in progress")
+            job = VerificationJob(owner, action)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn):
+        job.status = "running"
+        try:
+            result, http_status = fn(job)
+        except Exception as e:
+            logger.exception(f"Verification job {job.id} crashed")
+            result, http_status = {"error": f"{self.failure}: {str(e)}"}, 500
+        job.finish(result, http_status)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+verification_jobs = VerificationJobs()
+enrollment_jobs = VerificationJobs(workers=ENROLL_JOB_WORKERS, max_pending=ENROLL_JOB_MAX_PENDING,
+                                   kind="enrollment", failure="Bulk enrollment failed")
@@ -20,7 +20,7 @@ export const EmployeeAttendance: React.FC = () => {
   const fetchAttendanceHistory = async () => {
     setIsLoading(true);
     try {
-      const data = await attendanceService.getAttendanceHistory({ period, page: 1 });
+      const data = await attendanceService.getAttendanceHistory({ period });
       setAttendanceHistory(data.records);
     } catch (error) {
       console.error('Failed to fetch attendance history:', error);
@@ -25,12 +25,45 @@ export const attendanceService = {
     return response.data;
   },
 
+  // Headless verification: upload a short burst of camera frames for the server to check
+  markAttendanceWithFrames: async (location: { lat: number; lng: number }, frames: Blob[]) => {
+    const formData = new FormData();
+    formData.append('location', JSON.stringify(location));
+    frames.forEach((frame, i) => formData.append('frames', frame, `frame-${i}.jpg`));
+    const response = await api.post('/attendance/mark', formData);
+    return response.data;
+  },
+
+  punchOutWithFrames: async (location: { lat: number; lng: number }, frames: Blob[]) => {
+    const formData = new FormData();
+    formData.append('location', JSON.stringify(location));
+    frames.forEach((frame, i) => formData.append('frames', frame, `frame-${i}.jpg`));
+    const response = await api.post('/attendance/punch-out', formData);
+    return response.data;
+  },
+
+  // Asynchronous verification: returns a job id at once; follow it with getVerificationJob
+  // or an EventSource on `${API_BASE_URL}/attendance/jobs/<id>/events?jwt=<token>`
+  submitVerificationJob: async (action: 'mark' | 'punch-out', location: { lat: number; lng: number }, frames: Blob[]) => {
+    const formData = new FormData();
+    formData.append('location', JSON.stringify(location));
+    formData.append('async', '1');
+    frames.forEach((frame, i) => formData.append('frames', frame, `frame-${i}.jpg`));
+    const response = await api.post(`/attendance/${action}`, formData);
+    return response.data;
+  },
+
+  getVerificationJob: async (jobId: string) => {
+    const response = await api.get(`/attendance/jobs/${jobId}`);
+    return response.data;
+  },
+
   getTodayAttendance: async () => {
     const response = await api.get('/attendance/today');
     return response.data;
   },
 
-  getAttendanceHistory: async (params: { period: string; page: number }) => {
+  getAttendanceHistory: async (params: { period: string; after?: string; page_size?: number }) => {
     const response = await api.get('/attendance/history', { params });
     return response.data;
   },